@@ -5,16 +5,45 @@ Logs results, triggers alerts only when needed.
 """
 import json
 import time
-import subprocess
+import shutil
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 WORKSPACE = Path.home() / ".openclaw/workspace"
 STATE_FILE = WORKSPACE / "memory/heartbeat-state.json"
 LOG_DIR = WORKSPACE / "logs"
 
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed.
+
+    Anything orjson rejects (e.g. float subclasses) goes through the stdlib
+    encoder, so every value json.dumps accepts still works.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+# Last payload read from or written to STATE_FILE, to skip no-op saves
+_saved_payload = None
+
 def load_state():
+    global _saved_payload
     if STATE_FILE.exists():
-        return json.loads(STATE_FILE.read_text())
+        _saved_payload = STATE_FILE.read_bytes()
+        return _json_loads(_saved_payload)
     return {
         "lastChecks": {},
         "alertThresholds": {
@@ -25,8 +54,13 @@ def load_state():
     }
 
 def save_state(state):
+    global _saved_payload
+    payload = _json_dumps(state)
+    if payload == _saved_payload:
+        return
     STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+    STATE_FILE.write_bytes(payload)
+    _saved_payload = payload
 
 def check_token_balance():
     """Placeholder - integrate your token monitor."""
@@ -34,11 +68,8 @@ def check_token_balance():
 
 def check_disk_usage():
     """Check disk usage percentage."""
-    result = subprocess.run(
-        ["df", "-h", "/"], capture_output=True, text=True
-    )
-    # Parse output to get percentage
-    return 50  # placeholder
+    total, used, free = shutil.disk_usage("/")
+    return round(used * 100 / total, 1)
 
 def run_heartbeat():
     state = load_state()
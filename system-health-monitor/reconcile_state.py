@@ -10,33 +10,190 @@ Usage:
 
 import os
 import sys
+import gc
 import json
 import time
+import atexit
+import signal
+import threading
 from pathlib import Path
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 WORKSPACE = Path("/Users/kimimini/.openclaw/workspace")
 STATE_DIR = WORKSPACE / "state"
 LOG_FILE = WORKSPACE / "logs/reconciliation.log"
 RECONCILE_INTERVAL = 300  # 5 minutes in daemon mode
+FULL_SCAN_EVERY = 6  # Cycles between forced full process scans
+LOG_FLUSH_EVERY = 12  # Healthy daemon reports buffered before a flush (1 hour)
+
+# State file format written by bot_state.py (BOT_STATE_FORMAT=msgpack opts in)
+STATE_SUFFIX = '.msgpack' if os.environ.get('BOT_STATE_FORMAT') == 'msgpack' and msgpack is not None else '.json'
+_STATE_SUFFIXES = ('.json', '.msgpack') if msgpack is not None else ('.json',)
+
+# Case-sensitive substrings that identify a bot outright, checked in order
+_FIXED_BOT_IDS = (
+    ('mm_optimized_15m', 'mm_15m'),
+    ('mm_optimized_1h', 'mm_1h'),
+)
+# Assets of the directional long/short bots, checked in order
+_DIRECTIONAL_ASSETS = ('btc', 'doge')
+
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed.
+
+    Anything orjson rejects (e.g. float subclasses) goes through the stdlib
+    encoder, so every value json.dumps accepts still works.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def iso_utc_now(ns: Optional[int] = None) -> str:
+    """Format a UTC timestamp (default: now) as ISO 8601 with +00:00.
+
+    Builds the string from time.time_ns() directly instead of allocating
+    a timezone-aware datetime for every timestamp.
+    """
+    if ns is None:
+        ns = time.time_ns()
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{remainder // 1000:06d}+00:00'
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process exists without scanning the process table."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_start_time(pid: int):
+    """Start time of a process, or None if it is gone or can't be read.
+
+    Compared across cycles so a cached bot PID that has been reused by an
+    unrelated process isn't mistaken for the bot.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # starttime is field 22; the fields after the "(comm)" one start at field 3
+    return int(stat.rsplit(b')', 1)[1].split()[19])
+
+
+def _decode_state(data: bytes, suffix: str) -> Dict:
+    """Parse a state file's contents according to its suffix."""
+    if suffix == '.msgpack':
+        return msgpack.unpackb(data, raw=False)
+    return _json_loads(data)
+
+
+def _atomic_write_state(path: Path, obj) -> None:
+    """Write obj in the format of path's suffix via a temp file and rename."""
+    if path.suffix == '.msgpack':
+        data = msgpack.packb(obj, use_bin_type=True)
+    else:
+        data = _json_dumps(obj)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
 
 
 class StateReconciler:
     """Reconciles bot state files with actual process states."""
     
-    def __init__(self, auto_fix: bool = False):
+    def __init__(self, auto_fix: bool = False, daemon: bool = False):
         self.auto_fix = auto_fix
+        self.daemon = daemon
         self.mismatches = []
         self.fixed = []
+        self._log_fp = None
+        self._unflushed_reports = 0
+        self._pid_cache: Dict[int, object] = {}  # PID -> process start time
+        self._cached_process_states: Dict[str, Dict] = {}
+        self._cycles_since_scan = 0
+        self._state_paths: Dict[str, Path] = {}  # bot_id -> file read by get_file_states
+        
+    def get_process_states(self, expected_running: Iterable[str] = ()) -> Dict[str, Dict]:
+        """Get actual state of all bot processes.
+
+        Between full scans, the previous result is reused as long as every
+        bot PID it found is still the same live process (PID and start
+        time). A full scan runs when one of them has exited, when a bot in
+        expected_running (state file says running) isn't in the cached
+        result, or after FULL_SCAN_EVERY cycles. A bot is therefore never
+        reported missing on the strength of a cached scan.
+        """
+        if self._pid_cache and self._cycles_since_scan < FULL_SCAN_EVERY:
+            cached = self._cached_process_states
+            if (all(bot_id in cached for bot_id in expected_running)
+                    and all(_pid_alive(pid) and _process_start_time(pid) == started
+                            for pid, started in self._pid_cache.items())):
+                self._cycles_since_scan += 1
+                return {bot_id: dict(state) for bot_id, state in cached.items()}
+        
+        states = self._scan_processes()
         
-    def get_process_states(self) -> Dict[str, Dict]:
-        """Get actual state of all bot processes."""
+        # Only cache when every bot has a PID and start time to re-check
+        pid_cache = {}
+        for state in states.values():
+            started = _process_start_time(state['pid']) if state['pid'] is not None else None
+            if started is None:
+                pid_cache = {}
+                break
+            pid_cache[state['pid']] = started
+        self._pid_cache = pid_cache
+        self._cached_process_states = {bot_id: dict(state) for bot_id, state in states.items()}
+        self._cycles_since_scan = 1
+        
+        return states
+    
+    def _scan_processes(self) -> Dict[str, Dict]:
+        """Scan all system processes for bot processes."""
         states = {}
         
         try:
             import psutil
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
+            # process_iter() fetches the requested attrs under oneshot(), so
+            # only ask for what is actually used below.
+            for proc in psutil.process_iter(['pid', 'cmdline', 'create_time']):
                 try:
                     cmdline = proc.info.get('cmdline', [])
                     if not cmdline:
@@ -50,84 +207,140 @@ class StateReconciler:
                         states[bot_id] = {
                             'pid': proc.info['pid'],
                             'running': True,
-                            'started_at': datetime.fromtimestamp(
-                                proc.info['create_time'], timezone.utc
-                            ).isoformat(),
+                            'started_at': iso_utc_now(
+                                round(proc.info['create_time'] * 1_000_000) * 1000
+                            ),
                             'cmdline': cmd_str[:200]
                         }
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
         except ImportError:
-            # Fallback to ps command
-            import subprocess
-            result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
-            for line in result.stdout.split('\n'):
-                bot_id = self._extract_bot_id(line)
+            if os.path.isdir('/proc'):
+                states = self._scan_proc()
+            else:
+                # Fallback to ps command
+                import subprocess
+                result = subprocess.run(['ps', 'aux'], capture_output=True, text=True)
+                for line in result.stdout.split('\n'):
+                    bot_id = self._extract_bot_id(line)
+                    if bot_id and bot_id not in states:
+                        states[bot_id] = {
+                            'pid': None,
+                            'running': True,
+                            'started_at': None,
+                            'cmdline': line[:200]
+                        }
+        
+        return states
+    
+    def _scan_proc(self) -> Dict[str, Dict]:
+        """Find bot processes by reading /proc directly (Linux, no psutil)."""
+        states = {}
+        
+        with os.scandir('/proc') as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f'/proc/{entry.name}/cmdline', 'rb') as f:
+                        raw = f.read()
+                except OSError:
+                    continue
+                if not raw:
+                    continue
+                
+                cmd_str = raw.rstrip(b'\x00').replace(b'\x00', b' ').decode('utf-8', 'replace')
+                bot_id = self._extract_bot_id(cmd_str)
                 if bot_id and bot_id not in states:
                     states[bot_id] = {
-                        'pid': None,
+                        'pid': int(entry.name),
                         'running': True,
                         'started_at': None,
-                        'cmdline': line[:200]
+                        'cmdline': cmd_str[:200]
                     }
         
         return states
     
     def _extract_bot_id(self, cmdline: str) -> Optional[str]:
         """Extract bot ID from command line."""
+        for needle, bot_id in _FIXED_BOT_IDS:
+            if needle in cmdline:
+                return bot_id
+        
         cmdline_lower = cmdline.lower()
+        side = 'long' if 'long' in cmdline_lower else 'short' if 'short' in cmdline_lower else None
         
-        if 'mm_optimized_15m' in cmdline:
-            return 'mm_15m'
-        elif 'mm_optimized_1h' in cmdline:
-            return 'mm_1h'
-        elif 'bot_v1' in cmdline or ('python' in cmdline_lower and any(x in cmdline_lower for x in ['long', 'short'])):
+        if 'bot_v1' in cmdline or (side and 'python' in cmdline_lower):
             # Try to extract from filename
-            if 'btc' in cmdline_lower:
-                if 'long' in cmdline_lower:
-                    return 'btc_long_v1'
-                elif 'short' in cmdline_lower:
-                    return 'btc_short_v1'
-            elif 'doge' in cmdline_lower:
-                if 'long' in cmdline_lower:
-                    return 'doge_long_v1'
-                elif 'short' in cmdline_lower:
-                    return 'doge_short_v1'
-        elif 'hummingbot' in cmdline_lower:
+            if side:
+                for asset in _DIRECTIONAL_ASSETS:
+                    if asset in cmdline_lower:
+                        return f'{asset}_{side}_v1'
+            return None
+        
+        if 'hummingbot' in cmdline_lower:
             return 'hummingbot'
         
         return None
     
     def get_file_states(self) -> Dict[str, Dict]:
-        """Get states from all state files."""
+        """Get states from all state files.
+
+        A bot may have both a .json and a .msgpack file (e.g. while switching
+        formats); the newer one is used, and the configured format on a tie.
+        """
         states = {}
+        self._state_paths = {}
         
         if not STATE_DIR.exists():
             return states
         
-        for state_file in STATE_DIR.glob("*.json"):
+        # DirEntry.stat() reuses what the directory scan already fetched
+        # where the platform allows it, avoiding a Path and stat per file.
+        chosen = {}
+        with os.scandir(STATE_DIR) as entries:
+            for entry in entries:
+                bot_id, suffix = os.path.splitext(entry.name)
+                if suffix not in _STATE_SUFFIXES:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    rank = (entry.stat().st_mtime_ns, suffix == STATE_SUFFIX)
+                except OSError:
+                    continue
+                if bot_id not in chosen or rank > chosen[bot_id][0]:
+                    chosen[bot_id] = (rank, entry.path, suffix)
+        
+        for bot_id, ((mtime_ns, _), path, suffix) in chosen.items():
             try:
-                bot_id = state_file.stem
-                data = json.loads(state_file.read_text())
-                states[bot_id] = {
-                    'status': data.get('status', 'unknown'),
-                    'last_update': data.get('last_update'),
-                    'file_mtime': datetime.fromtimestamp(
-                        state_file.stat().st_mtime, timezone.utc
-                    ).isoformat()
-                }
-            except (json.JSONDecodeError, IOError):
+                with open(path, 'rb') as f:
+                    data = _decode_state(f.read(), suffix)
+            except (ValueError, IOError):
                 continue
+            bot_id = sys.intern(bot_id)
+            status = data.get('status', 'unknown')
+            states[bot_id] = {
+                # Statuses repeat across bots and cycles; share one string each
+                'status': sys.intern(status) if isinstance(status, str) else status,
+                'last_update': data.get('last_update'),
+                'file_mtime': iso_utc_now(mtime_ns)
+            }
+            self._state_paths[bot_id] = Path(path)
         
         return states
     
     def reconcile(self) -> Dict:
         """Compare and reconcile process states with file states."""
-        process_states = self.get_process_states()
+        now_iso = iso_utc_now()
         file_states = self.get_file_states()
+        process_states = self.get_process_states(expected_running=[
+            bot_id for bot_id, file_state in file_states.items()
+            if file_state['status'] in ['running', 'active']
+        ])
         
         report = {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': now_iso,
             'processes_found': len(process_states),
             'state_files_found': len(file_states),
             'mismatches': [],
@@ -147,7 +360,7 @@ class StateReconciler:
                 report['healthy'] = False
                 
                 if self.auto_fix:
-                    self._create_state_file(bot_id, proc_state)
+                    self._create_state_file(bot_id, proc_state, now_iso=now_iso)
                     report['fixed'].append(bot_id)
         
         # Check for state files without running processes
@@ -163,14 +376,15 @@ class StateReconciler:
                     report['healthy'] = False
                     
                     if self.auto_fix:
-                        self._update_state_to_stopped(bot_id)
+                        self._update_state_to_stopped(bot_id, now_iso=now_iso)
                         report['fixed'].append(bot_id)
         
         return report
     
-    def _create_state_file(self, bot_id: str, proc_state: Dict):
+    def _create_state_file(self, bot_id: str, proc_state: Dict, now_iso: Optional[str] = None):
         """Create a state file for a running bot."""
-        state_file = STATE_DIR / f"{bot_id}.json"
+        now_iso = now_iso or iso_utc_now()
+        state_file = STATE_DIR / f"{bot_id}{STATE_SUFFIX}"
         state = {
             'bot_id': bot_id,
             'bot_name': bot_id.replace('_', ' ').title(),
@@ -178,33 +392,55 @@ class StateReconciler:
             'status_color': 'green',
             'pid': proc_state['pid'],
             'started_at': proc_state['started_at'],
-            'last_update': datetime.now(timezone.utc).isoformat(),
+            'last_update': now_iso,
             'reconciled': True
         }
         
         STATE_DIR.mkdir(parents=True, exist_ok=True)
-        state_file.write_text(json.dumps(state, indent=2))
+        _atomic_write_state(state_file, state)
     
-    def _update_state_to_stopped(self, bot_id: str):
+    def _update_state_to_stopped(self, bot_id: str, now_iso: Optional[str] = None):
         """Update state file to reflect stopped status."""
-        state_file = STATE_DIR / f"{bot_id}.json"
+        now_iso = now_iso or iso_utc_now()
+        state_file = self._state_paths.get(bot_id, STATE_DIR / f"{bot_id}{STATE_SUFFIX}")
         if state_file.exists():
             try:
-                state = json.loads(state_file.read_text())
+                state = _decode_state(state_file.read_bytes(), state_file.suffix)
                 state['status'] = 'stopped'
                 state['status_color'] = 'red'
-                state['last_update'] = datetime.now(timezone.utc).isoformat()
+                state['last_update'] = now_iso
                 state['reconciled'] = True
-                state_file.write_text(json.dumps(state, indent=2))
-            except (json.JSONDecodeError, IOError):
+                _atomic_write_state(state_file, state)
+            except (ValueError, IOError):
                 pass
     
     def log_report(self, report: Dict):
-        """Log reconciliation report."""
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        """Log reconciliation report.
+
+        In daemon mode the log stays open across cycles and healthy reports
+        are buffered, flushed every LOG_FLUSH_EVERY reports; a report with
+        mismatches is flushed and fsynced immediately.
+        """
+        if not self.daemon:
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(LOG_FILE, 'ab') as f:
+                f.write(_json_dumps(report) + b'\n')
+            return
         
-        with open(LOG_FILE, 'a') as f:
-            f.write(json.dumps(report) + '\n')
+        if self._log_fp is None:
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            self._log_fp = open(LOG_FILE, 'ab', buffering=64 * 1024)
+            atexit.register(self._log_fp.close)
+        
+        self._log_fp.write(_json_dumps(report) + b'\n')
+        self._unflushed_reports += 1
+        if not report['healthy']:
+            self._log_fp.flush()
+            os.fsync(self._log_fp.fileno())
+            self._unflushed_reports = 0
+        elif self._unflushed_reports >= LOG_FLUSH_EVERY:
+            self._log_fp.flush()
+            self._unflushed_reports = 0
     
     def print_report(self, report: Dict):
         """Print human-readable report."""
@@ -236,18 +472,30 @@ def main():
     parser.add_argument("--json", action="store_true", help="Output JSON")
     args = parser.parse_args()
     
-    reconciler = StateReconciler(auto_fix=args.fix)
+    reconciler = StateReconciler(auto_fix=args.fix, daemon=args.daemon)
     
     if args.daemon:
         print(f"Starting state reconciliation daemon (interval: {RECONCILE_INTERVAL}s)")
-        while True:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        
+        # Each scan churns through many short-lived dicts; batch the young
+        # generation work and do one full collection per idle period.
+        gc.set_threshold(10_000, 50, 10)
+        
+        # Sleep until a monotonic deadline rather than a fixed interval so
+        # cycle time doesn't accumulate as drift; SIGTERM wakes us at once.
+        deadline = time.monotonic()
+        while not stop.is_set():
+            deadline = max(deadline + RECONCILE_INTERVAL, time.monotonic())
             report = reconciler.reconcile()
             reconciler.log_report(report)
             
             if not args.json:
                 reconciler.print_report(report)
             
-            time.sleep(RECONCILE_INTERVAL)
+            gc.collect()
+            stop.wait(max(0, deadline - time.monotonic()))
     else:
         report = reconciler.reconcile()
         reconciler.log_report(report)
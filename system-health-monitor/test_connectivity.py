@@ -12,13 +12,70 @@ import os
 import sys
 import json
 import time
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass, asdict
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 WORKSPACE = Path("/Users/kimimini/.openclaw/workspace")
 LOG_FILE = WORKSPACE / "logs/connectivity.log"
+BRAVE_SEARCH_URL = "https://api.search.brave.com/res/v1/web/search"
+TELEGRAM_GET_ME_URL = "https://api.telegram.org/bot{token}/getMe"
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def iso_utc_now(ns: Optional[int] = None) -> str:
+    """Format a UTC timestamp (default: now) as ISO 8601 with +00:00.
+
+    Builds the string from time.time_ns() directly instead of allocating
+    a timezone-aware datetime for every timestamp.
+    """
+    if ns is None:
+        ns = time.time_ns()
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{remainder // 1000:06d}+00:00'
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session():
+    """Return the shared HTTP session, creating it on first use.
+
+    Reusing one pooled session keeps connections alive between tests (and
+    between runs in a long-lived process), so repeat calls skip the TCP and
+    TLS handshakes. Raises ImportError if requests is not installed.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            session.headers["Connection"] = "keep-alive"
+            session.mount("https://", HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=8,
+                max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+            ))
+            _SESSION = session
+        return _SESSION
 
 
 @dataclass
@@ -33,24 +90,50 @@ class TestResult:
 class ConnectivityTester:
     """Tests connectivity to external services."""
     
+    # Optional dependencies, imported on first use by the test that needs them
+    _modules: Dict[str, Any] = {}
+    
     def __init__(self):
         self.results: List[TestResult] = []
+        self._env_cache: Optional[Dict[str, str]] = None
+        self._env_mtimes: Optional[tuple] = None
         
     def load_env(self) -> Dict[str, str]:
-        """Load environment variables from files."""
-        env_vars = {}
-        for env_file in ['.env', '.env.local', '.env.alerts']:
-            path = WORKSPACE / env_file
-            if path.exists():
+        """Load environment variables from files.
+
+        The parsed files are cached and only re-read when one of them is
+        added, removed or modified.
+        """
+        paths = [WORKSPACE / env_file for env_file in ['.env', '.env.local', '.env.alerts']]
+        mtimes = tuple((path, path.stat().st_mtime) for path in paths if path.exists())
+        
+        if self._env_cache is None or mtimes != self._env_mtimes:
+            file_vars = {}
+            for path, _ in mtimes:
                 with open(path) as f:
                     for line in f:
                         line = line.strip()
                         if line and not line.startswith('#') and '=' in line:
                             key, value = line.split('=', 1)
-                            env_vars[key] = value.strip('"\'')
+                            file_vars[key] = value.strip('"\'')
+            self._env_cache = file_vars
+            self._env_mtimes = mtimes
+        
+        env_vars = dict(self._env_cache)
         env_vars.update({k: v for k, v in os.environ.items()})
         return env_vars
     
+    def _lazy_import(self, name: str):
+        """Import an optional dependency once and cache it on the class.
+
+        Raises ImportError if the module is not installed.
+        """
+        module = self._modules.get(name)
+        if module is None:
+            module = importlib.import_module(name)
+            self._modules[name] = module
+        return module
+    
     def test_moonshot(self) -> TestResult:
         """Test Moonshot API connectivity."""
         start = time.time()
@@ -64,7 +147,7 @@ class ConnectivityTester:
                     success=False,
                     latency_ms=0,
                     message="API key not configured",
-                    timestamp=datetime.now(timezone.utc).isoformat()
+                    timestamp=iso_utc_now()
                 )
             
             latency = (time.time() - start) * 1000
@@ -73,7 +156,7 @@ class ConnectivityTester:
                 success=True,
                 latency_ms=round(latency, 2),
                 message="API key configured (handled by OpenClaw)",
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
         except Exception as e:
             latency = (time.time() - start) * 1000
@@ -82,14 +165,14 @@ class ConnectivityTester:
                 success=False,
                 latency_ms=round(latency, 2),
                 message=str(e),
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
     
     def test_brave_search(self) -> TestResult:
         """Test Brave Search API."""
         start = time.time()
         try:
-            import requests
+            session = _get_session()
             env = self.load_env()
             api_key = env.get('BRAVE_API_KEY')
             
@@ -99,42 +182,77 @@ class ConnectivityTester:
                     success=False,
                     latency_ms=0,
                     message="API key not configured",
-                    timestamp=datetime.now(timezone.utc).isoformat()
+                    timestamp=iso_utc_now()
                 )
             
-            response = requests.get(
-                "https://api.search.brave.com/res/v1/web/search",
+            response = session.get(
+                BRAVE_SEARCH_URL,
                 headers={"X-Subscription-Token": api_key},
                 params={"q": "connectivity test", "count": 1},
                 timeout=10
             )
-            
-            latency = (time.time() - start) * 1000
-            
-            if response.status_code == 200:
-                return TestResult(
-                    service="Brave Search",
-                    success=True,
-                    latency_ms=round(latency, 2),
-                    message=f"HTTP {response.status_code}",
-                    timestamp=datetime.now(timezone.utc).isoformat()
-                )
-            else:
-                return TestResult(
-                    service="Brave Search",
-                    success=False,
-                    latency_ms=round(latency, 2),
-                    message=f"HTTP {response.status_code}",
-                    timestamp=datetime.now(timezone.utc).isoformat()
-                )
+            return self._brave_result(response, start)
         except ImportError:
             return TestResult(
                 service="Brave Search",
                 success=False,
                 latency_ms=0,
                 message="requests library not installed",
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
+            )
+        except Exception as e:
+            latency = (time.time() - start) * 1000
+            return TestResult(
+                service="Brave Search",
+                success=False,
+                latency_ms=round(latency, 2),
+                message=str(e),
+                timestamp=iso_utc_now()
+            )
+    
+    def _brave_result(self, response, start: float) -> TestResult:
+        """Build the Brave Search result from an HTTP response."""
+        latency = (time.time() - start) * 1000
+        
+        if response.status_code == 200:
+            return TestResult(
+                service="Brave Search",
+                success=True,
+                latency_ms=round(latency, 2),
+                message=f"HTTP {response.status_code}",
+                timestamp=iso_utc_now()
+            )
+        else:
+            return TestResult(
+                service="Brave Search",
+                success=False,
+                latency_ms=round(latency, 2),
+                message=f"HTTP {response.status_code}",
+                timestamp=iso_utc_now()
+            )
+    
+    async def _test_brave_search_async(self, client) -> TestResult:
+        """Test Brave Search API on a shared httpx.AsyncClient."""
+        start = time.time()
+        try:
+            api_key = self.load_env().get('BRAVE_API_KEY')
+            
+            if not api_key:
+                return TestResult(
+                    service="Brave Search",
+                    success=False,
+                    latency_ms=0,
+                    message="API key not configured",
+                    timestamp=iso_utc_now()
+                )
+            
+            response = await client.get(
+                BRAVE_SEARCH_URL,
+                headers={"X-Subscription-Token": api_key},
+                params={"q": "connectivity test", "count": 1},
+                timeout=10
             )
+            return self._brave_result(response, start)
         except Exception as e:
             latency = (time.time() - start) * 1000
             return TestResult(
@@ -142,14 +260,14 @@ class ConnectivityTester:
                 success=False,
                 latency_ms=round(latency, 2),
                 message=str(e),
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
     
     def test_okx(self) -> TestResult:
         """Test OKX exchange API."""
         start = time.time()
         try:
-            import ccxt
+            ccxt = self._lazy_import('ccxt')
             
             # Test public API first (no auth needed)
             exchange = ccxt.okx({'enableRateLimit': True})
@@ -162,7 +280,7 @@ class ConnectivityTester:
                 success=True,
                 latency_ms=round(latency, 2),
                 message=f"BTC: ${ticker['last']}",
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
         except ImportError:
             return TestResult(
@@ -170,7 +288,7 @@ class ConnectivityTester:
                 success=False,
                 latency_ms=0,
                 message="ccxt library not installed",
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
         except Exception as e:
             latency = (time.time() - start) * 1000
@@ -179,14 +297,14 @@ class ConnectivityTester:
                 success=False,
                 latency_ms=round(latency, 2),
                 message=str(e),
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
     
     def test_telegram(self) -> TestResult:
         """Test Telegram bot API."""
         start = time.time()
         try:
-            import requests
+            session = _get_session()
             env = self.load_env()
             token = env.get('TELEGRAM_BOT_TOKEN')
             
@@ -196,40 +314,21 @@ class ConnectivityTester:
                     success=False,
                     latency_ms=0,
                     message="Bot token not configured",
-                    timestamp=datetime.now(timezone.utc).isoformat()
+                    timestamp=iso_utc_now()
                 )
             
-            response = requests.get(
-                f"https://api.telegram.org/bot{token}/getMe",
+            response = session.get(
+                TELEGRAM_GET_ME_URL.format(token=token),
                 timeout=10
             )
-            
-            latency = (time.time() - start) * 1000
-            
-            if response.status_code == 200 and response.json().get('ok'):
-                bot_info = response.json()['result']
-                return TestResult(
-                    service="Telegram",
-                    success=True,
-                    latency_ms=round(latency, 2),
-                    message=f"@{bot_info.get('username', 'unknown')}",
-                    timestamp=datetime.now(timezone.utc).isoformat()
-                )
-            else:
-                return TestResult(
-                    service="Telegram",
-                    success=False,
-                    latency_ms=round(latency, 2),
-                    message="Invalid token or API error",
-                    timestamp=datetime.now(timezone.utc).isoformat()
-                )
+            return self._telegram_result(response, start)
         except ImportError:
             return TestResult(
                 service="Telegram",
                 success=False,
                 latency_ms=0,
                 message="requests library not installed",
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
             )
         except Exception as e:
             latency = (time.time() - start) * 1000
@@ -238,7 +337,57 @@ class ConnectivityTester:
                 success=False,
                 latency_ms=round(latency, 2),
                 message=str(e),
-                timestamp=datetime.now(timezone.utc).isoformat()
+                timestamp=iso_utc_now()
+            )
+    
+    def _telegram_result(self, response, start: float) -> TestResult:
+        """Build the Telegram result from a getMe response."""
+        latency = (time.time() - start) * 1000
+        
+        data = response.json() if response.status_code == 200 else None
+        if data and data.get('ok'):
+            bot_info = data['result']
+            return TestResult(
+                service="Telegram",
+                success=True,
+                latency_ms=round(latency, 2),
+                message=f"@{bot_info.get('username', 'unknown')}",
+                timestamp=iso_utc_now()
+            )
+        else:
+            return TestResult(
+                service="Telegram",
+                success=False,
+                latency_ms=round(latency, 2),
+                message="Invalid token or API error",
+                timestamp=iso_utc_now()
+            )
+    
+    async def _test_telegram_async(self, client) -> TestResult:
+        """Test Telegram bot API on a shared httpx.AsyncClient."""
+        start = time.time()
+        try:
+            token = self.load_env().get('TELEGRAM_BOT_TOKEN')
+            
+            if not token:
+                return TestResult(
+                    service="Telegram",
+                    success=False,
+                    latency_ms=0,
+                    message="Bot token not configured",
+                    timestamp=iso_utc_now()
+                )
+            
+            response = await client.get(TELEGRAM_GET_ME_URL.format(token=token), timeout=10)
+            return self._telegram_result(response, start)
+        except Exception as e:
+            latency = (time.time() - start) * 1000
+            return TestResult(
+                service="Telegram",
+                success=False,
+                latency_ms=round(latency, 2),
+                message=str(e),
+                timestamp=iso_utc_now()
             )
     
     def run_all_tests(self, service_filter: Optional[str] = None) -> Dict:
@@ -253,25 +402,59 @@ class ConnectivityTester:
         if service_filter:
             tests = {k: v for k, v in tests.items() if service_filter.lower() in k.lower()}
         
+        # Tests are I/O-bound, so running them side by side makes the total
+        # latency roughly that of the slowest service instead of the sum.
+        # When an HTTP test (Brave, Telegram) is selected and httpx is
+        # installed, they share one event loop and HTTP client; otherwise
+        # they run in a thread pool without importing asyncio or httpx.
         results = []
-        for name, test_func in tests.items():
-            result = test_func()
-            results.append(asdict(result))
+        if tests:
+            httpx = None
+            if tests.keys() & {'brave', 'telegram'}:
+                try:
+                    httpx = self._lazy_import('httpx')
+                except ImportError:
+                    pass
+            
+            if httpx is not None:
+                asyncio = self._lazy_import('asyncio')
+                results = [asdict(result) for result in asyncio.run(self._run_async(tests, httpx))]
+            else:
+                with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                    futures = {name: executor.submit(test_func) for name, test_func in tests.items()}
+                    results = [asdict(future.result()) for future in futures.values()]
         
         all_healthy = all(r['success'] for r in results)
         
         return {
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': iso_utc_now(),
             'tests_run': len(results),
             'healthy': all_healthy,
             'results': results
         }
     
+    async def _run_async(self, tests: Dict, httpx) -> List[TestResult]:
+        """Run tests concurrently, with HTTP tests on a shared AsyncClient."""
+        asyncio = self._lazy_import('asyncio')
+        async_tests = {
+            'brave': self._test_brave_search_async,
+            'telegram': self._test_telegram_async
+        }
+        # HTTP/2 needs the optional h2 package
+        http2 = importlib.util.find_spec('h2') is not None
+        transport = httpx.AsyncHTTPTransport(http2=http2, retries=2)
+        
+        async with httpx.AsyncClient(transport=transport, timeout=10) as client:
+            return await asyncio.gather(*(
+                async_tests[name](client) if name in async_tests else asyncio.to_thread(test_func)
+                for name, test_func in tests.items()
+            ))
+    
     def log_results(self, report: Dict):
         """Log test results."""
         LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(LOG_FILE, 'a') as f:
-            f.write(json.dumps(report) + '\n')
+        with open(LOG_FILE, 'ab') as f:
+            f.write(_json_dumps(report) + b'\n')
     
     def print_report(self, report: Dict):
         """Print human-readable report."""
@@ -9,15 +9,43 @@ Usage:
 """
 
 import os
+import re
 import sys
 import json
+import time
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from datetime import datetime, timezone
+from types import MappingProxyType
 from typing import Dict, List, Tuple, Optional
 
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 WORKSPACE = Path("/Users/kimimini/.openclaw/workspace")
+API_CACHE_TTL = 300  # Seconds to reuse a successful API test
+API_CACHE_FAILURE_TTL = 30  # Failures are retried sooner
+
+# KEY=value lines of a .env file; comment and blank lines never match.
+# Same result as stripping each line and splitting on the first '='.
+_ENV_LINE_RE = re.compile(r'^[^\S\n]*([^\s#=][^=\n]*|)=(.*)$', re.M)
+
+# Shared connection pools for the API tests, so TLS sessions are reused across threads
+_POOL = None
+if urllib3 is not None:
+    _POOL = urllib3.PoolManager(num_pools=4, maxsize=4, timeout=urllib3.Timeout(connect=3, read=10))
 
 # Required configuration keys with validation
-REQUIRED_CONFIGS = {
+REQUIRED_CONFIGS = MappingProxyType({
     "BRAVE_API_KEY": {
         "description": "Brave Search API for web searches",
         "test_method": "brave"
@@ -42,12 +70,33 @@ REQUIRED_CONFIGS = {
         "optional": True,
         "test_method": "telegram"
     }
-}
+})
+
+# REQUIRED_CONFIGS as parallel tuples, so validate() reads fields by index
+_ConfigColumns = namedtuple("_ConfigColumns", "keys descriptions optionals test_methods")
+_CFG = _ConfigColumns(
+    keys=tuple(REQUIRED_CONFIGS),
+    descriptions=tuple(meta["description"] for meta in REQUIRED_CONFIGS.values()),
+    optionals=tuple(bool(meta.get("optional")) for meta in REQUIRED_CONFIGS.values()),
+    test_methods=tuple(meta.get("test_method") for meta in REQUIRED_CONFIGS.values())
+)
+
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class ConfigValidator:
     """Validates system configuration."""
     
+    # (stat key, parsed values) for the .env files, shared across instances
+    _env_cache: Optional[Tuple[tuple, Dict[str, str]]] = None
+    # API test results by provider and key hash: (monotonic time, success, message)
+    _api_cache: Dict[str, Tuple[float, bool, str]] = {}
+    
     def __init__(self, quick_mode: bool = False):
         self.quick_mode = quick_mode
         self.results = []
@@ -56,73 +105,98 @@ class ConfigValidator:
         
     def check_env_file(self, env_path: Path) -> Dict[str, str]:
         """Load environment variables from file."""
-        env_vars = {}
-        if env_path.exists():
-            with open(env_path) as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key] = value.strip('"\'')
-        return env_vars
+        try:
+            text = env_path.read_text()
+        except FileNotFoundError:
+            return {}
+        return {key: value.rstrip().strip('"\'') for key, value in _ENV_LINE_RE.findall(text)}
+    
+    def _env_cache_key(self, paths: List[Path]) -> tuple:
+        """Stat each env file so changes to any of them invalidate the cache."""
+        key = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                key.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                key.append((path, None, None))
+        return tuple(key)
     
     def check_all_sources(self) -> Dict[str, str]:
         """Check multiple config sources."""
-        configs = {}
+        # Check .env files, re-parsing only when one of them has changed
+        paths = [WORKSPACE / env_file for env_file in ['.env', '.env.local', '.env.alerts']]
+        cache_key = self._env_cache_key(paths)
+        cached = ConfigValidator._env_cache
         
-        # Check .env files
-        for env_file in ['.env', '.env.local', '.env.alerts']:
-            configs.update(self.check_env_file(WORKSPACE / env_file))
+        if cached is not None and cached[0] == cache_key:
+            file_configs = cached[1]
+        else:
+            file_configs = {}
+            for path in paths:
+                file_configs.update(self.check_env_file(path))
+            ConfigValidator._env_cache = (cache_key, file_configs)
+        
+        configs = dict(file_configs)
         
         # Check environment
-        configs.update({k: v for k, v in os.environ.items()})
+        configs.update(os.environ)
         
         return configs
     
     def test_brave_api(self, api_key: str) -> Tuple[bool, str]:
         """Test Brave Search API connectivity."""
+        if _POOL is None:
+            return False, "urllib3 library not installed"
         try:
-            import requests
-            response = requests.get(
+            response = _POOL.request(
+                "GET",
                 "https://api.search.brave.com/res/v1/web/search",
-                headers={"X-Subscription-Token": api_key},
-                params={"q": "test", "count": 1},
-                timeout=10
+                fields={"q": "test", "count": "1"},
+                headers={"X-Subscription-Token": api_key}
             )
-            if response.status_code == 200:
+            if response.status == 200:
                 return True, "API key valid"
-            elif response.status_code == 401:
+            elif response.status == 401:
                 return False, "API key invalid or expired"
             else:
-                return False, f"HTTP {response.status_code}"
-        except ImportError:
-            return False, "requests library not installed"
+                return False, f"HTTP {response.status}"
         except Exception as e:
             return False, str(e)
     
     def test_telegram_api(self, token: str) -> Tuple[bool, str]:
         """Test Telegram bot API."""
+        if _POOL is None:
+            return False, "urllib3 library not installed"
         try:
-            import requests
-            response = requests.get(
-                f"https://api.telegram.org/bot{token}/getMe",
-                timeout=10
-            )
-            if response.status_code == 200 and response.json().get('ok'):
+            response = _POOL.request("GET", f"https://api.telegram.org/bot{token}/getMe")
+            if response.status == 200 and _json_loads(response.data).get('ok'):
                 return True, "Token valid"
             else:
                 return False, "Invalid token"
-        except ImportError:
-            return False, "requests library not installed"
         except Exception as e:
             return False, str(e)
     
+    def _cached_api_test(self, provider: str, tester, api_key: str) -> Tuple[bool, str]:
+        """Run an API test, reusing a recent result for the same key."""
+        cache_key = f"{provider}:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+        cached = self._api_cache.get(cache_key)
+        if cached is not None:
+            checked_at, success, msg = cached
+            ttl = API_CACHE_TTL if success else API_CACHE_FAILURE_TTL
+            if time.monotonic() - checked_at < ttl:
+                return success, msg
+        
+        success, msg = tester(api_key)
+        self._api_cache[cache_key] = (time.monotonic(), success, msg)
+        return success, msg
+    
     def validate(self) -> Dict:
         """Run full validation."""
         configs = self.check_all_sources()
         results = {
-            "timestamp": json.dumps({}),
-            "configs_checked": len(REQUIRED_CONFIGS),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "configs_checked": len(_CFG.keys),
             "present": [],
             "missing_required": [],
             "missing_optional": [],
@@ -130,27 +204,45 @@ class ConfigValidator:
             "healthy": True
         }
         
-        for key, meta in REQUIRED_CONFIGS.items():
-            if key in configs and configs[key]:
+        testers = {
+            "brave": self.test_brave_api,
+            "telegram": self.test_telegram_api
+        }
+        api_tests = []
+        
+        for i, key in enumerate(_CFG.keys):
+            optional = _CFG.optionals[i]
+            val = configs.get(key)
+            if val:
                 results["present"].append(key)
                 
-                # Test API if not in quick mode
-                if not self.quick_mode and meta.get("test_method"):
-                    if meta["test_method"] == "brave":
-                        success, msg = self.test_brave_api(configs[key])
-                        results["api_tests"][key] = {"success": success, "message": msg}
-                        if not success:
-                            results["healthy"] = False
-                    elif meta["test_method"] == "telegram":
-                        success, msg = self.test_telegram_api(configs[key])
-                        results["api_tests"][key] = {"success": success, "message": msg}
+                # Queue API test if not in quick mode
+                test_method = _CFG.test_methods[i]
+                if not self.quick_mode and test_method in testers:
+                    api_tests.append((key, test_method, val, optional))
             else:
-                if meta.get("optional"):
-                    results["missing_optional"].append({"key": key, "description": meta["description"]})
+                if optional:
+                    results["missing_optional"].append({"key": key, "description": _CFG.descriptions[i]})
                 else:
-                    results["missing_required"].append({"key": key, "description": meta["description"]})
+                    results["missing_required"].append({"key": key, "description": _CFG.descriptions[i]})
                     results["healthy"] = False
         
+        # API tests only wait on the network, so run them side by side
+        if api_tests:
+            with ThreadPoolExecutor(max_workers=len(api_tests)) as executor:
+                futures = [
+                    (key, optional, executor.submit(
+                        self._cached_api_test, test_method, testers[test_method], value
+                    ))
+                    for key, test_method, value, optional in api_tests
+                ]
+                for key, optional, future in futures:
+                    success, msg = future.result()
+                    results["api_tests"][key] = {"success": success, "message": msg}
+                    # A failing optional service doesn't make the system unhealthy
+                    if not success and not optional:
+                        results["healthy"] = False
+        
         return results
     
     def print_report(self, results: Dict):
@@ -202,11 +294,14 @@ def main():
     results = validator.validate()
     
     if args.json:
-        print(json.dumps(results, indent=2))
-        sys.exit(0 if results["healthy"] else 1)
+        if orjson is not None:
+            print(orjson.dumps(results, option=orjson.OPT_INDENT_2).decode())
+        else:
+            print(json.dumps(results, indent=2))
     else:
         validator.print_report(results)
-        sys.exit(0 if results["healthy"] else 1)
+    
+    sys.exit(0 if results["healthy"] else 1)
 
 
 if __name__ == "__main__":
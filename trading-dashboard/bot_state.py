@@ -4,6 +4,10 @@ Bot State Writer - Standardized state management for trading bots
 
 Writes bot state to JSON files that the dashboard reads.
 Each bot gets its own state file: state/{bot_id}.json
+(or state/{bot_id}.msgpack with BOT_STATE_FORMAT=msgpack and msgpack installed).
+Updates that change nothing but the timestamp only touch state/{bot_id}.heartbeat.
+Trades are appended to state/{bot_id}.trades.log and folded into the
+state file within a few seconds (or on the next update/flush).
 
 Usage:
     from bot_state import BotStateWriter
@@ -16,13 +20,125 @@ Usage:
     })
 """
 
+import os
+import copy
 import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timezone
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 STATE_DIR = Path("/Users/kimimini/.openclaw/workspace/state")
+TRADE_COMPACT_INTERVAL = 5.0  # Seconds between folding the trade journal into state
+
+# Opt-in binary state files; stays on JSON if msgpack isn't installed
+USE_MSGPACK = os.environ.get("BOT_STATE_FORMAT") == "msgpack" and msgpack is not None
+_STATE_SUFFIXES = ('.json', '.msgpack')
+
+# Dashboard color for each bot status (unknown statuses show yellow)
+_STATUS_COLORS = MappingProxyType({
+    "running": "green",
+    "active": "green",
+    "initializing": "yellow",
+    "paused": "yellow",
+    "stopped": "red",
+    "error": "red",
+    "offline": "gray"
+})
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed.
+
+    Anything orjson rejects (e.g. float subclasses) goes through the stdlib
+    encoder, so every value json.dumps accepts still works.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _encode_state(state: Dict[str, Any], suffix: str) -> bytes:
+    """Serialize a state dict for a file with the given suffix."""
+    if suffix == '.msgpack':
+        return msgpack.packb(state, use_bin_type=True)
+    return _json_dumps(state)
+
+
+def _decode_state(data: bytes, suffix: str) -> Dict[str, Any]:
+    """Parse a state file's contents according to its suffix."""
+    if suffix == '.msgpack':
+        return msgpack.unpackb(data, raw=False)
+    return _json_loads(data)
+
+
+def iso_utc_now() -> str:
+    """Current UTC time as an ISO 8601 string ending in +00:00."""
+    seconds, remainder = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + f'.{remainder // 1000:06d}+00:00'
+
+
+# Initial state of every bot; bot_id and bot_name are filled in per writer.
+# Kept pre-serialized so each writer gets a fresh deep copy from one parse.
+_DEFAULT_STATE_BYTES = _json_dumps({
+    "bot_id": None,
+    "bot_name": None,
+    "status": "initializing",
+    "status_color": "yellow",
+    "pnl_total": 0.0,
+    "pnl_24h": 0.0,
+    "trades_total": 0,
+    "trades_24h": 0,
+    "trade_seq": 0,
+    "position": None,
+    "last_update": None,
+    "last_error": None,
+    "uptime_seconds": 0,
+    "version": "1.0.0"
+})
+
+
+# STATE_DIR already created by this process (skips a mkdir per writer)
+_ready_state_dir: Optional[Path] = None
+_state_dir_lock = threading.Lock()
+
+
+def _ensure_state_dir() -> None:
+    """Create STATE_DIR once per process."""
+    global _ready_state_dir
+    if _ready_state_dir == STATE_DIR:
+        return
+    with _state_dir_lock:
+        if _ready_state_dir != STATE_DIR:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            _ready_state_dir = STATE_DIR
+
+
+def status_color_for(status: str) -> str:
+    """Dashboard color for a bot status."""
+    return _STATUS_COLORS.get(status, "yellow")
 
 
 class BotStateWriter:
@@ -38,74 +154,182 @@ class BotStateWriter:
         """
         self.bot_id = bot_id
         self.bot_name = bot_name or bot_id
-        self.state_file = STATE_DIR / f"{bot_id}.json"
+        self.state_file = STATE_DIR / f"{bot_id}{'.msgpack' if USE_MSGPACK else '.json'}"
+        self.heartbeat_file = STATE_DIR / f"{bot_id}.heartbeat"
+        # String paths for _write, built once instead of per write
+        self._state_path = str(self.state_file)
+        self._temp_path = self._state_path + ".tmp"
+        self.journal_file = STATE_DIR / f"{bot_id}.trades.log"
+        self._last_hash: Optional[int] = None
+        self._last_stat: Optional[tuple] = None  # (inode, mtime_ns, size) after our last write
+        self._journal_fp = None
+        self._journal_pending = False
+        self._last_compact = time.monotonic()
+        self._compact_timer: Optional[threading.Timer] = None
+        # Guards state and files against the compaction timer thread
+        self._lock = threading.RLock()
         
         # Ensure state directory exists
-        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        _ensure_state_dir()
         
         # Initialize with default state
-        self._default_state = {
-            "bot_id": bot_id,
-            "bot_name": self.bot_name,
-            "status": "initializing",
-            "status_color": "yellow",
-            "pnl_total": 0.0,
-            "pnl_24h": 0.0,
-            "trades_total": 0,
-            "trades_24h": 0,
-            "position": None,
-            "last_update": None,
-            "last_error": None,
-            "uptime_seconds": 0,
-            "version": "1.0.0"
-        }
+        self._default_state = _json_loads(_DEFAULT_STATE_BYTES)
+        self._default_state["bot_id"] = bot_id
+        self._default_state["bot_name"] = self.bot_name
+        
+        # Current state is kept in memory; the file is only written to
+        self._load()
         
         # Create initial state file if it doesn't exist
         if not self.state_file.exists():
-            self._write(self._default_state)
+            self._write(self._state, durable=True)
+    
+    def invalidate(self) -> None:
+        """Reload state from disk, e.g. after another process modified the file."""
+        with self._lock:
+            self._load()
+    
+    def _load(self) -> None:
+        """Read the state file and replay trades journaled after it."""
+        self._state = self._default_state.copy()
+        try:
+            saved = _decode_state(self.state_file.read_bytes(), self.state_file.suffix)
+        except (ValueError, IOError):
+            # Missing or corrupt (e.g. truncated by a crash): start from defaults
+            saved = None
+        if isinstance(saved, dict):
+            self._state.update(saved)
+        self._last_hash = None
+        
+        # Trades journaled but not yet compacted (e.g. before a crash).
+        # Trades at or below the state's trade_seq are already counted in it,
+        # which happens if we crashed between writing state and truncating.
+        if self.journal_file.exists():
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        trade = _json_loads(line)
+                    except ValueError:
+                        continue  # Torn final line from a crash mid-append
+                    seq = trade.pop("seq", None)
+                    if seq is not None and seq <= self._state.get("trade_seq", 0):
+                        continue
+                    self._apply_trade(trade, seq)
+                    self._journal_pending = True
+            if self._journal_pending:
+                self._write(self._state, durable=True)
     
-    def _write(self, state: Dict[str, Any]) -> None:
-        """Write state to JSON file atomically."""
+    def flush(self) -> None:
+        """Fold journaled trades into the state file."""
+        with self._lock:
+            if self._journal_pending:
+                self._write(self._state)
+    
+    def close(self) -> None:
+        """Flush pending trades and close the trade journal."""
+        with self._lock:
+            if self._compact_timer is not None:
+                self._compact_timer.cancel()
+                self._compact_timer = None
+            self.flush()
+            if self._journal_fp is not None:
+                self._journal_fp.close()
+                self._journal_fp = None
+    
+    def _compact_on_timer(self) -> None:
+        """Timer callback: fold trades that arrived since the last compaction."""
+        with self._lock:
+            self._compact_timer = None
+            self.flush()
+    
+    def _write(self, state: Dict[str, Any], now_iso: Optional[str] = None, durable: bool = False) -> None:
+        """
+        Write state to JSON file.
+        
+        The state is written to a temp file and renamed over the old one, so
+        readers never see a partial file. With durable=True (startup, stop,
+        error) the temp file and directory are also fsynced so the state
+        survives a crash.
+        
+        If nothing but last_update changed since the previous write, and the
+        state file is still the one this writer last wrote, only the small
+        {bot_id}.heartbeat file is refreshed with the new timestamp.
+        """
+        # Key order is stable across updates (new keys are appended), so the
+        # unsorted encoding is enough to spot a change and tolerates mixed
+        # key types that sort_keys would reject
+        content = {k: v for k, v in state.items() if k != "last_update"}
+        state_hash = hash(_json_dumps(content))
+        state["last_update"] = now_iso or iso_utc_now()
+        
+        if (state_hash == self._last_hash and not durable and not self._journal_pending
+                and self._state_file_unchanged()):
+            self.heartbeat_file.write_text(state["last_update"])
+            return
+        
+        payload = _encode_state(state, self.state_file.suffix)
         # Write to temp file first, then rename (atomic operation)
-        temp_file = self.state_file.with_suffix('.tmp')
-        state["last_update"] = datetime.now(timezone.utc).isoformat()
-        temp_file.write_text(json.dumps(state, indent=2))
-        temp_file.replace(self.state_file)
+        fd = os.open(self._temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_all(fd, payload)
+            if durable:
+                os.fsync(fd)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        os.replace(self._temp_path, self._state_path)
+        if durable:
+            _fsync_dir(STATE_DIR)
+        self._last_hash = state_hash
+        self._last_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        
+        # The state file now includes every journaled trade
+        if self._journal_pending:
+            if self._journal_fp is not None:
+                self._journal_fp.truncate(0)
+            else:
+                self.journal_file.write_bytes(b"")
+            self._journal_pending = False
+            self._last_compact = time.monotonic()
     
-    def update(self, updates: Dict[str, Any]) -> Dict[str, Any]:
+    def _state_file_unchanged(self) -> bool:
+        """Whether the state file is still exactly what this writer last wrote.
+
+        Another process (e.g. the reconciler) may have rewritten it; then the
+        next write must restore it rather than only touching the heartbeat.
+        """
+        try:
+            st = os.stat(self._state_path)
+        except OSError:
+            return False
+        return (st.st_ino, st.st_mtime_ns, st.st_size) == self._last_stat
+    
+    def update(self, updates: Dict[str, Any], durable: bool = False) -> Dict[str, Any]:
         """
         Update bot state with new values.
         
         Args:
             updates: Dictionary of fields to update
+            durable: Write atomically and fsync (for milestone states)
             
         Returns:
             Complete current state
         """
-        # Read current state
-        current = self._default_state.copy()
-        if self.state_file.exists():
-            current.update(json.loads(self.state_file.read_text()))
-        
-        # Apply updates
-        current.update(updates)
-        
-        # Set status color based on status
-        status = current.get("status", "unknown")
-        color_map = {
-            "running": "green",
-            "active": "green",
-            "initializing": "yellow",
-            "paused": "yellow",
-            "stopped": "red",
-            "error": "red",
-            "offline": "gray"
-        }
-        current["status_color"] = color_map.get(status, "yellow")
-        
-        # Write updated state
-        self._write(current)
-        return current
+        with self._lock:
+            # Apply updates to a copy, kept only once it has been written,
+            # so a failed write can't leave unwritable values in memory
+            current = {**self._state, **copy.deepcopy(updates)}
+            
+            # Set status color based on status
+            status = current.get("status", "unknown")
+            current["status_color"] = status_color_for(status)
+            
+            # Write updated state
+            self._write(current, durable=durable)
+            self._state = current
+            return copy.deepcopy(current)
     
     def set_running(self, extra_fields: Optional[Dict] = None) -> Dict[str, Any]:
         """Set bot status to running."""
@@ -119,7 +343,7 @@ class BotStateWriter:
         return self.update({
             "status": "error",
             "last_error": error_message
-        })
+        }, durable=True)
     
     def set_paused(self) -> Dict[str, Any]:
         """Set bot status to paused."""
@@ -127,24 +351,58 @@ class BotStateWriter:
     
     def set_stopped(self) -> Dict[str, Any]:
         """Set bot status to stopped."""
-        return self.update({"status": "stopped"})
+        return self.update({"status": "stopped"}, durable=True)
     
     def record_trade(self, pnl: float, side: str) -> Dict[str, Any]:
-        """Record a completed trade."""
-        current = json.loads(self.state_file.read_text()) if self.state_file.exists() else self._default_state
+        """
+        Record a completed trade.
         
-        current["trades_total"] = current.get("trades_total", 0) + 1
-        current["trades_24h"] = current.get("trades_24h", 0) + 1
-        current["pnl_total"] = current.get("pnl_total", 0) + pnl
-        current["pnl_24h"] = current.get("pnl_24h", 0) + pnl
-        current["last_trade"] = {
-            "time": datetime.now(timezone.utc).isoformat(),
+        The trade is appended to the journal right away; the state file is
+        rewritten at most every TRADE_COMPACT_INTERVAL seconds. A timer folds
+        in the last trades of a burst, or sooner on the next update() or
+        flush().
+        """
+        now_iso = iso_utc_now()
+        trade = {
+            "time": now_iso,
             "pnl": pnl,
             "side": side
         }
-        
-        self._write(current)
-        return current
+        with self._lock:
+            seq = self._state.get("trade_seq", 0) + 1
+            
+            # Journal first: if serializing or appending fails, the trade
+            # must not be counted in memory either
+            line = _json_dumps({**trade, "seq": seq}) + b"\n"
+            if self._journal_fp is None:
+                self._journal_fp = open(self.journal_file, 'ab', buffering=0)
+            _write_all(self._journal_fp.fileno(), line)
+            self._journal_pending = True
+            
+            self._apply_trade(trade, seq)
+            self._state["last_update"] = now_iso
+            
+            since_compact = time.monotonic() - self._last_compact
+            if since_compact >= TRADE_COMPACT_INTERVAL:
+                self._write(self._state, now_iso)
+            elif self._compact_timer is None:
+                self._compact_timer = threading.Timer(
+                    TRADE_COMPACT_INTERVAL - since_compact, self._compact_on_timer
+                )
+                self._compact_timer.daemon = True
+                self._compact_timer.start()
+            return copy.deepcopy(self._state)
+    
+    def _apply_trade(self, trade: Dict[str, Any], seq: Optional[int] = None) -> None:
+        """Add a trade to the in-memory counters."""
+        current = self._state
+        if seq is not None:
+            current["trade_seq"] = seq
+        current["trades_total"] = current.get("trades_total", 0) + 1
+        current["trades_24h"] = current.get("trades_24h", 0) + 1
+        current["pnl_total"] = current.get("pnl_total", 0) + trade["pnl"]
+        current["pnl_24h"] = current.get("pnl_24h", 0) + trade["pnl"]
+        current["last_trade"] = trade
     
     def update_position(self, side: Optional[str], size: float, entry_price: Optional[float] = None) -> Dict[str, Any]:
         """Update current position."""
@@ -155,15 +413,63 @@ class BotStateWriter:
                 "side": side,
                 "size": size,
                 "entry_price": entry_price,
-                "opened_at": datetime.now(timezone.utc).isoformat()
+                "opened_at": iso_utc_now()
             }
         return self.update({"position": position})
     
     def get_state(self) -> Dict[str, Any]:
-        """Read current state."""
-        if self.state_file.exists():
-            return json.loads(self.state_file.read_text())
-        return self._default_state.copy()
+        """Return an independent copy of the current state."""
+        with self._lock:
+            return copy.deepcopy(self._state)
+    
+    def export_pretty(self) -> str:
+        """Return current state as indented JSON for human inspection."""
+        return json.dumps(self._state, indent=2)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """os.write() until all of data is written (short writes are allowed)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _fsync_dir(path: Path) -> None:
+    """Flush a directory entry change (e.g. a rename) to disk where supported."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _apply_heartbeat(state: Dict[str, Any], heartbeat_path: str) -> Dict[str, Any]:
+    """Use the heartbeat file's timestamp as last_update when it is newer."""
+    try:
+        with open(heartbeat_path) as f:
+            heartbeat = f.read().strip()
+    except IOError:
+        return state
+    if heartbeat > (state.get("last_update") or ""):
+        state["last_update"] = heartbeat
+    return state
+
+
+def _read_bot_state(state_path: str, heartbeat_path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Read one state file, or return None if it is unreadable."""
+    try:
+        with open(state_path, 'rb') as f:
+            state = _decode_state(f.read(), os.path.splitext(state_path)[1])
+    except (ValueError, IOError):
+        return None
+    if heartbeat_path:
+        _apply_heartbeat(state, heartbeat_path)
+    return state
 
 
 def get_all_bot_states() -> Dict[str, Dict[str, Any]]:
@@ -174,13 +480,44 @@ def get_all_bot_states() -> Dict[str, Dict[str, Any]]:
         Dictionary mapping bot_id to state
     """
     states = {}
-    if STATE_DIR.exists():
-        for state_file in STATE_DIR.glob("*.json"):
-            try:
-                bot_id = state_file.stem
-                states[bot_id] = json.loads(state_file.read_text())
-            except (json.JSONDecodeError, IOError):
-                continue
+    try:
+        with os.scandir(STATE_DIR) as it:
+            entries = [entry for entry in it if entry.name.endswith(_STATE_SUFFIXES + ('.heartbeat',))]
+    except FileNotFoundError:
+        return states
+    
+    heartbeats = {
+        entry.name[:-len('.heartbeat')]: entry.path
+        for entry in entries if entry.name.endswith('.heartbeat')
+    }
+    
+    # One state file per bot: if both formats exist, the newer one wins,
+    # and the configured format on a tie
+    active_suffix = '.msgpack' if USE_MSGPACK else '.json'
+    chosen = {}
+    for entry in entries:
+        bot_id, suffix = os.path.splitext(entry.name)
+        if suffix not in _STATE_SUFFIXES or (suffix == '.msgpack' and msgpack is None):
+            continue
+        try:
+            rank = (entry.stat().st_mtime_ns, suffix == active_suffix)
+        except OSError:
+            continue
+        if bot_id not in chosen or rank > chosen[bot_id][0]:
+            chosen[bot_id] = (rank, entry.path)
+    if not chosen:
+        return states
+    
+    # Each read blocks on the filesystem, so issue them concurrently
+    with ThreadPoolExecutor(max_workers=min(16, len(chosen))) as executor:
+        futures = {}
+        for bot_id, (_, path) in chosen.items():
+            futures[bot_id] = executor.submit(_read_bot_state, path, heartbeats.get(bot_id))
+        
+        for bot_id, future in futures.items():
+            state = future.result()
+            if state is not None:
+                states[bot_id] = state
     return states
 
 
@@ -189,6 +526,38 @@ def clear_all_states() -> None:
     if STATE_DIR.exists():
         for state_file in STATE_DIR.glob("*.json"):
             state_file.unlink()
+        for state_file in STATE_DIR.glob("*.msgpack"):
+            state_file.unlink()
+        for heartbeat_file in STATE_DIR.glob("*.heartbeat"):
+            heartbeat_file.unlink()
+        for journal_file in STATE_DIR.glob("*.trades.log"):
+            journal_file.unlink()
+
+
+def migrate_json_to_msgpack() -> int:
+    """
+    Convert every JSON state file to msgpack, removing the JSON original.
+    
+    Returns:
+        Number of files converted
+    """
+    if msgpack is None:
+        raise ImportError("msgpack is required to migrate state files")
+    
+    converted = 0
+    if STATE_DIR.exists():
+        for state_file in STATE_DIR.glob("*.json"):
+            try:
+                state = _json_loads(state_file.read_bytes())
+            except (json.JSONDecodeError, IOError):
+                continue
+            target = state_file.with_suffix('.msgpack')
+            temp_file = target.with_name(target.name + '.tmp')
+            temp_file.write_bytes(_encode_state(state, '.msgpack'))
+            temp_file.replace(target)
+            state_file.unlink()
+            converted += 1
+    return converted
 
 
 if __name__ == "__main__":
@@ -206,7 +575,7 @@ if __name__ == "__main__":
     test_bot.update_position("long", 0.5, 45000.00)
     
     print(f"Created test bot state: {test_bot.state_file}")
-    print(json.dumps(test_bot.get_state(), indent=2))
+    print(test_bot.export_pretty())
     
     # Show all bot states
     print("\nAll bot states:")
@@ -215,5 +584,8 @@ if __name__ == "__main__":
         print(f"  {bot_id}: {state.get('status', 'unknown')}")
     
     # Clean up test file
+    test_bot.close()
     test_bot.state_file.unlink()
+    test_bot.heartbeat_file.unlink(missing_ok=True)
+    test_bot.journal_file.unlink(missing_ok=True)
     print("\nTest complete. Test state file removed.")